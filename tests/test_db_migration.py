@@ -0,0 +1,130 @@
+import importlib.util
+import sqlite3
+import unittest
+from pathlib import Path
+
+# Тесты загружают trip-bot.py целиком, поэтому нужны зависимости из requirements.txt
+# (telegram, geopy, cartopy, matplotlib). При импорте бот читает bot_token.txt,
+# bot_name.txt и message.txt рядом с собой и создаёт temp/ в текущем каталоге.
+BOT_PATH = Path(__file__).resolve().parent.parent / 'trip-bot.py'
+try:
+    spec = importlib.util.spec_from_file_location('trip_bot', BOT_PATH)
+    bot = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(bot)
+    SKIP_REASON = None
+except ModuleNotFoundError as e:
+    bot = None
+    SKIP_REASON = f'trip-bot.py dependencies are not installed: {e.name}'
+
+LEGACY_DDL = '''CREATE TABLE visited_places
+                (user_id INTEGER, place_name TEXT, latitude REAL, longitude REAL,
+                 status TEXT DEFAULT 'visited',
+                 PRIMARY KEY (user_id, place_name))'''
+
+PLACES_DDL = '''CREATE TABLE places
+                (place_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                 osm_type TEXT, osm_id INTEGER,
+                 name TEXT NOT NULL, display_name TEXT, country TEXT,
+                 latitude REAL NOT NULL, longitude REAL NOT NULL,
+                 UNIQUE (osm_type, osm_id))'''
+
+
+class FakeLocation:
+    def __init__(self, address, latitude, longitude, osm_type=None, osm_id=None):
+        self.address = address
+        self.latitude = latitude
+        self.longitude = longitude
+        self.raw = {'display_name': address, 'address': {'country': address.split(',')[-1].strip()}}
+        if osm_type:
+            self.raw.update({'osm_type': osm_type, 'osm_id': osm_id})
+
+
+def user_places(conn, user_id):
+    return conn.execute('SELECT p.name, p.latitude, p.longitude, v.status FROM visited_places v '
+                        'JOIN places p ON p.place_id = v.place_id '
+                        'WHERE v.user_id = ? ORDER BY p.name', (user_id,)).fetchall()
+
+
+@unittest.skipIf(bot is None, SKIP_REASON)
+class MigrateVisitedPlacesTest(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.execute(PLACES_DDL)
+        self.conn.execute(LEGACY_DDL)
+
+    def tearDown(self):
+        self.conn.close()
+
+    def add_legacy(self, *rows):
+        self.conn.executemany('INSERT INTO visited_places VALUES (?, ?, ?, ?, ?)', rows)
+        self.conn.commit()
+
+    def test_happy_path(self):
+        self.add_legacy((1, 'Paris', 48.85, 2.35, 'visited'),
+                        (1, 'Rome', 41.9, 12.5, 'want_to_visit'))
+        bot.migrate_visited_places(self.conn)
+        self.assertEqual(user_places(self.conn, 1),
+                         [('Paris', 48.85, 2.35, 'visited'), ('Rome', 41.9, 12.5, 'want_to_visit')])
+        tables = {r[0] for r in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        self.assertNotIn('visited_places_legacy', tables)
+
+    def test_identical_rows_share_catalog_entry(self):
+        self.add_legacy((1, 'Paris', 48.85, 2.35, 'visited'),
+                        (2, 'Paris', 48.85, 2.35, 'want_to_visit'))
+        bot.migrate_visited_places(self.conn)
+        self.assertEqual(self.conn.execute('SELECT COUNT(*) FROM places').fetchone()[0], 1)
+        self.assertEqual(user_places(self.conn, 2), [('Paris', 48.85, 2.35, 'want_to_visit')])
+
+    def test_row_without_coordinates_is_skipped(self):
+        self.add_legacy((1, 'Nowhere', None, None, 'visited'),
+                        (1, 'Paris', 48.85, 2.35, 'visited'))
+        bot.migrate_visited_places(self.conn)
+        self.assertEqual(user_places(self.conn, 1), [('Paris', 48.85, 2.35, 'visited')])
+
+    def test_failed_migration_is_rolled_back_and_can_be_rerun(self):
+        self.add_legacy((1, 'Paris', 48.85, 2.35, 'visited'))
+        self.conn.execute('''CREATE TRIGGER fail_insert BEFORE INSERT ON places
+                             BEGIN SELECT RAISE(ABORT, 'boom'); END''')
+        with self.assertRaises(sqlite3.DatabaseError):
+            bot.migrate_visited_places(self.conn)
+        columns = [r[1] for r in self.conn.execute('PRAGMA table_info(visited_places)')]
+        self.assertIn('place_name', columns)
+
+        self.conn.execute('DROP TRIGGER fail_insert')
+        bot.migrate_visited_places(self.conn)
+        self.assertEqual(user_places(self.conn, 1), [('Paris', 48.85, 2.35, 'visited')])
+
+
+@unittest.skipIf(bot is None, SKIP_REASON)
+class GetOrCreatePlaceTest(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.execute(PLACES_DDL)
+        self.c = self.conn.cursor()
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_links_migrated_place_to_osm_id(self):
+        self.c.execute("INSERT INTO places (name, display_name, latitude, longitude) "
+                       "VALUES ('Paris', 'Paris', 48.85, 2.35)")
+        legacy_id = self.c.lastrowid
+        location = FakeLocation('Paris, Ile-de-France, France', 48.85, 2.35, 'relation', 7444)
+        self.assertEqual(bot.get_or_create_place(self.c, location), legacy_id)
+        self.assertEqual(self.conn.execute('SELECT osm_type, osm_id, country FROM places').fetchall(),
+                         [('relation', 7444, 'France')])
+
+    def test_same_name_in_different_places_is_not_merged(self):
+        springfield_il = FakeLocation('Springfield, Illinois, United States', 39.8, -89.6, 'relation', 1)
+        springfield_mo = FakeLocation('Springfield, Missouri, United States', 37.2, -93.3, 'relation', 2)
+        self.assertNotEqual(bot.get_or_create_place(self.c, springfield_il),
+                            bot.get_or_create_place(self.c, springfield_mo))
+
+    def test_place_without_osm_id_is_reused(self):
+        location = FakeLocation('Atlantis, Ocean', 10.0, 20.0)
+        self.assertEqual(bot.get_or_create_place(self.c, location),
+                         bot.get_or_create_place(self.c, location))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -56,6 +56,12 @@ USER_INPUT_STATE = {}
 
 BOT_VERSION = '0.7'
 
+# Размер пачки строк при миграции visited_places в каталог places
+MIGRATION_BATCH_SIZE = 500
+# Допуск (в градусах, ~1 км) при сопоставлении мест без OSM id: одноимённые точки
+# ближе этого расстояния считаются одним местом и объединяются
+PLACE_MATCH_TOLERANCE = 0.01
+
 # BBOX для мира и континентов (min_lon, min_lat, max_lon, max_lat)
 CONTINENT_BBOX = {
     'Europe':        (-10, 35, 60, 70),
@@ -68,30 +74,42 @@ CONTINENT_BBOX = {
     'World':         (-180, -55, 180, 75)
 }
 
+VISITED_PLACES_DDL = '''CREATE TABLE IF NOT EXISTS visited_places
+                        (user_id INTEGER,
+                         place_id INTEGER REFERENCES places(place_id),
+                         status TEXT DEFAULT 'visited',
+                         PRIMARY KEY (user_id, place_id))'''
+
 def init_db():
     """Initialize the SQLite database with optimized settings."""
     conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
     
-    # Создаем таблицу, если её нет
-    c.execute('''CREATE TABLE IF NOT EXISTS visited_places
-                 (user_id INTEGER, place_name TEXT, latitude REAL, longitude REAL,
-                  status TEXT DEFAULT 'visited',
-                  PRIMARY KEY (user_id, place_name))''')
-    
-    # Проверяем, есть ли колонка status
+    # Общий каталог мест: одна запись на объект OSM, разделяется всеми пользователями
+    c.execute('''CREATE TABLE IF NOT EXISTS places
+                 (place_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  osm_type TEXT, osm_id INTEGER,
+                  name TEXT NOT NULL, display_name TEXT, country TEXT,
+                  latitude REAL NOT NULL, longitude REAL NOT NULL,
+                  UNIQUE (osm_type, osm_id))''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_places_name ON places(name)')
+
     c.execute("PRAGMA table_info(visited_places)")
     columns = [column[1] for column in c.fetchall()]
-    
-    # Если колонки status нет, добавляем её
-    if 'status' not in columns:
-        try:
-            # Добавляем колонку status со значением по умолчанию 'visited'
-            c.execute('ALTER TABLE visited_places ADD COLUMN status TEXT DEFAULT "visited"')
-            conn.commit()
-            logger.info("Successfully added status column to visited_places table")
-        except sqlite3.OperationalError as e:
-            logger.error(f"Error adding status column: {e}")
+
+    if 'place_name' in columns:
+        # Старая схема: если колонки status нет, добавляем её перед миграцией
+        if 'status' not in columns:
+            try:
+                # Добавляем колонку status со значением по умолчанию 'visited'
+                c.execute('ALTER TABLE visited_places ADD COLUMN status TEXT DEFAULT "visited"')
+                conn.commit()
+                logger.info("Successfully added status column to visited_places table")
+            except sqlite3.OperationalError as e:
+                logger.error(f"Error adding status column: {e}")
+        migrate_visited_places(conn)
+    else:
+        c.execute(VISITED_PLACES_DDL)
     
     c.execute('CREATE INDEX IF NOT EXISTS idx_user_id ON visited_places(user_id)')
     # Таблица для хранения языка пользователя
@@ -100,6 +118,97 @@ def init_db():
     conn.commit()
     conn.close()
 
+def migrate_visited_places(conn):
+    """Move legacy (user_id, place_name, lat, lon, status) rows into the places catalog."""
+    # Явная транзакция: переименование, копирование и удаление применяются или откатываются вместе
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None
+    c = conn.cursor()
+    try:
+        c.execute('BEGIN')
+        c.execute('ALTER TABLE visited_places RENAME TO visited_places_legacy')
+        c.execute(VISITED_PLACES_DDL)
+        # Читаем старые строки пачками, чтобы не загружать всю таблицу в память
+        legacy = conn.execute('SELECT user_id, place_name, latitude, longitude, status '
+                              'FROM visited_places_legacy')
+        migrated = 0
+        skipped = 0
+        while True:
+            rows = legacy.fetchmany(MIGRATION_BATCH_SIZE)
+            if not rows:
+                break
+            for user_id, place_name, lat, lon, status in rows:
+                # Без координат место не нанести на карту: пропускаем с предупреждением
+                if lat is None or lon is None or not place_name:
+                    logger.warning(f"Skipping legacy place without name or coordinates: "
+                                   f"user_id={user_id}, place_name={place_name!r}")
+                    skipped += 1
+                    continue
+                place_id = find_unlinked_place(c, place_name, lat, lon)
+                if place_id is None:
+                    c.execute('INSERT INTO places (name, display_name, latitude, longitude) '
+                              'VALUES (?, ?, ?, ?)', (place_name, place_name, lat, lon))
+                    place_id = c.lastrowid
+                c.execute('INSERT INTO visited_places VALUES (?, ?, ?)',
+                          (user_id, place_id, status or 'visited'))
+                migrated += 1
+        c.execute('DROP TABLE visited_places_legacy')
+        c.execute('COMMIT')
+        logger.info(f"Migrated {migrated} rows of visited_places to the places catalog, "
+                    f"skipped {skipped}")
+    except sqlite3.Error as e:
+        if conn.in_transaction:
+            c.execute('ROLLBACK')
+        logger.error(f"Error migrating visited_places: {e}")
+        raise
+    finally:
+        conn.isolation_level = isolation_level
+
+def find_unlinked_place(c, name, lat, lon):
+    """Return place_id of a catalog entry without OSM id matching name and coordinates."""
+    c.execute('SELECT place_id FROM places WHERE osm_id IS NULL AND name = ? '
+              'AND ABS(latitude - ?) < ? AND ABS(longitude - ?) < ?',
+              (name, lat, PLACE_MATCH_TOLERANCE, lon, PLACE_MATCH_TOLERANCE))
+    row = c.fetchone()
+    return row[0] if row else None
+
+def get_or_create_place(c, location):
+    """Return place_id of a geocoded location in the shared catalog, adding it if needed."""
+    raw = getattr(location, 'raw', {}) or {}
+    osm_type = raw.get('osm_type')
+    osm_id = raw.get('osm_id')
+    name = location.address.split(',')[0].strip()
+    display_name = raw.get('display_name', location.address)
+    country = raw.get('address', {}).get('country')
+
+    if osm_type and osm_id is not None:
+        c.execute('SELECT place_id FROM places WHERE osm_type = ? AND osm_id = ?',
+                  (osm_type, int(osm_id)))
+        row = c.fetchone()
+        if row:
+            return row[0]
+        # Перенесённая запись без OSM id: привязываем её, а не создаём дубликат
+        place_id = find_unlinked_place(c, name, location.latitude, location.longitude)
+        if place_id is not None:
+            c.execute('UPDATE places SET osm_type = ?, osm_id = ?, display_name = ?, '
+                      'country = COALESCE(?, country) WHERE place_id = ?',
+                      (osm_type, int(osm_id), display_name, country, place_id))
+            return place_id
+        c.execute('INSERT INTO places '
+                  '(osm_type, osm_id, name, display_name, country, latitude, longitude) '
+                  'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                  (osm_type, int(osm_id), name, display_name, country,
+                   location.latitude, location.longitude))
+        return c.lastrowid
+
+    place_id = find_unlinked_place(c, name, location.latitude, location.longitude)
+    if place_id is not None:
+        return place_id
+    c.execute('INSERT INTO places (name, display_name, country, latitude, longitude) '
+              'VALUES (?, ?, ?, ?, ?)',
+              (name, display_name, country, location.latitude, location.longitude))
+    return c.lastrowid
+
 def get_geocoder():
     """Get a rate-limited geocoder instance."""
     geolocator = Nominatim(user_agent="travel_map_bot", timeout=10)
@@ -169,8 +278,9 @@ async def add_place(update: Update, context: ContextTypes.DEFAULT_TYPE, status='
         conn = sqlite3.connect(DB_PATH)
         c = conn.cursor()
         try:
-            c.execute('INSERT OR REPLACE INTO visited_places VALUES (?, ?, ?, ?, ?)',
-                     (user_id, simplified_address, location.latitude, location.longitude, status))
+            place_id = get_or_create_place(c, location)
+            c.execute('INSERT OR REPLACE INTO visited_places VALUES (?, ?, ?)',
+                     (user_id, place_id, status))
             conn.commit()
             status_text = "visited" if status == 'visited' else "want to visit"
             await update.message.reply_text(f'Added {simplified_address} to your {status_text} places!')
@@ -210,8 +320,9 @@ async def handle_city_choice(update: Update, context: ContextTypes.DEFAULT_TYPE)
                 conn = sqlite3.connect(DB_PATH)
                 c = conn.cursor()
                 try:
-                    c.execute('INSERT OR REPLACE INTO visited_places VALUES (?, ?, ?, ?, ?)',
-                             (user_id, simplified_address, location.latitude, location.longitude, status))
+                    place_id = get_or_create_place(c, location)
+                    c.execute('INSERT OR REPLACE INTO visited_places VALUES (?, ?, ?)',
+                             (user_id, place_id, status))
                     conn.commit()
                     status_text = "visited" if status == 'visited' else "want to visit"
                     await update.message.reply_text(f'Added {simplified_address} to your {status_text} places!')
@@ -378,7 +489,8 @@ async def generate_map_image(update: Update, context: ContextTypes.DEFAULT_TYPE)
 
     conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
-    c.execute('SELECT place_name, latitude, longitude, status FROM visited_places WHERE user_id = ?', (user_id,))
+    c.execute('SELECT p.name, p.latitude, p.longitude, v.status FROM visited_places v '
+              'JOIN places p ON p.place_id = v.place_id WHERE v.user_id = ?', (user_id,))
     places = c.fetchall()
     conn.close()
 
@@ -509,40 +621,49 @@ async def list_places(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
-    c.execute('SELECT place_name, latitude, longitude, status FROM visited_places WHERE user_id = ? ORDER BY status, place_name', (user_id,))
+    c.execute('SELECT p.place_id, p.name, p.display_name, p.country, p.latitude, p.longitude, v.status '
+              'FROM visited_places v JOIN places p ON p.place_id = v.place_id '
+              'WHERE v.user_id = ? ORDER BY v.status, p.name', (user_id,))
     places = c.fetchall()
-    conn.close()
 
     if not places:
+        conn.close()
         await update.message.reply_text('You haven\'t added any places yet!')
         return
 
-    from geopy.geocoders import Nominatim
     geolocator = Nominatim(user_agent="travel_map_bot", timeout=10)
     
     visited_places = []
     want_to_visit_places = []
     
-    for place_name, lat, lon, status in places:
+    for place_id, place_name, full_name, country, lat, lon, status in places:
+        # Полный адрес от геокодера различает одноимённые места (Springfield в разных штатах)
+        if full_name and full_name != place_name:
+            display_name = full_name
         # Если place_name уже содержит запятую и страну, используем как есть
-        if ',' in place_name:
+        elif ',' in place_name:
             display_name = place_name
         else:
-            # Получаем страну по координатам через reverse
-            try:
-                location = geolocator.reverse((lat, lon), exactly_one=True, language="en", addressdetails=True)
-                country = ''
-                if location and hasattr(location, 'raw'):
-                    address = location.raw.get('address', {})
-                    country = address.get('country', '')
-                display_name = f"{place_name}, {country}" if country else place_name
-            except Exception:
-                display_name = place_name
+            if country is None:
+                # Страны нет в каталоге (перенесённые записи): получаем через reverse
+                # и сохраняем, чтобы запрос выполнялся один раз на место, а не на пользователя
+                try:
+                    location = geolocator.reverse((lat, lon), exactly_one=True, language="en", addressdetails=True)
+                    country = ''
+                    if location and hasattr(location, 'raw'):
+                        address = location.raw.get('address', {})
+                        country = address.get('country', '')
+                    c.execute('UPDATE places SET country = ? WHERE place_id = ?', (country, place_id))
+                    conn.commit()
+                except Exception:
+                    country = ''
+            display_name = f"{place_name}, {country}" if country else place_name
         
         if status == 'visited':
             visited_places.append(f"📍 {display_name}")
         else:
             want_to_visit_places.append(f"🎯 {display_name}")
+    conn.close()
     
     result = []
     if visited_places:
@@ -568,10 +689,19 @@ async def remove_place(update: Update, context: ContextTypes.DEFAULT_TYPE):
     conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
     
-    # Find matching places
-    c.execute('SELECT place_name FROM visited_places WHERE user_id = ? AND place_name LIKE ?', 
-             (user_id, f'%{place_name}%'))
+    # Find matching places: полный адрес принимается только целиком (для выбора
+    # среди одноимённых мест), иначе ищем подстроку в коротком названии
+    c.execute('SELECT p.place_id, p.name, p.display_name FROM visited_places v '
+              'JOIN places p ON p.place_id = v.place_id '
+              'WHERE v.user_id = ? AND LOWER(p.display_name) = LOWER(?)',
+             (user_id, place_name))
     places = c.fetchall()
+    if not places:
+        c.execute('SELECT p.place_id, p.name, p.display_name FROM visited_places v '
+                  'JOIN places p ON p.place_id = v.place_id '
+                  'WHERE v.user_id = ? AND p.name LIKE ?',
+                 (user_id, f'%{place_name}%'))
+        places = c.fetchall()
     
     if not places:
         await update.message.reply_text('Place not found in your visited places.')
@@ -579,20 +709,22 @@ async def remove_place(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
     
     if len(places) > 1:
-        places_list = '\n'.join([f"📍 {place[0]}" for place in places])
+        # Одноимённые места (например, Springfield в разных штатах) различаем по полному адресу
+        places_list = '\n'.join([f"📍 {place[2] or place[1]}" for place in places])
         await update.message.reply_text(
-            f'Multiple matches found. Please be more specific:\n{places_list}'
+            f'Multiple matches found. Please be more specific '
+            f'(or send the full address from the list):\n{places_list}'
         )
         conn.close()
         return
     
     # Remove the place
-    c.execute('DELETE FROM visited_places WHERE user_id = ? AND place_name = ?',
+    c.execute('DELETE FROM visited_places WHERE user_id = ? AND place_id = ?',
              (user_id, places[0][0]))
     conn.commit()
     conn.close()
     
-    await update.message.reply_text(f'Removed {places[0][0]} from your visited places!')
+    await update.message.reply_text(f'Removed {places[0][1]} from your visited places!')
 
 def get_bbox_for_scale(scale, continent, places):
     if scale == 'world':